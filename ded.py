@@ -4,6 +4,7 @@ import time
 import os
 import json
 import sys
+import threading
 from datetime import datetime
 
 # GPIO configuration
@@ -32,77 +33,116 @@ DEFAULT_SETTINGS = {
     'room5': {'min_temp': 20, 'max_temp': 25, 'manual_heat': False, 'manual_cool': False}
 }
 
+class RoomSettings:
+    """Per-room thresholds and manual overrides"""
+    __slots__ = ('min_temp', 'max_temp', 'manual_heat', 'manual_cool')
+    
+    def __init__(self, min_temp, max_temp, manual_heat, manual_cool):
+        self.min_temp = min_temp
+        self.max_temp = max_temp
+        self.manual_heat = manual_heat
+        self.manual_cool = manual_cool
+        
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['min_temp'], d['max_temp'], d['manual_heat'], d['manual_cool'])
+        
+    def to_dict(self):
+        return {'min_temp': self.min_temp, 'max_temp': self.max_temp,
+                'manual_heat': self.manual_heat, 'manual_cool': self.manual_cool}
+
 # Initialize GPIO
 chip = None
-line_requests = {}
+relay_lines = None  # All relay lines, requested together
+relay_pins = list(RELAY_PINS.values())
+relay_values = {pin: 1 for pin in relay_pins}  # Last value written to each pin
 
 try:
     chip = gpiod.Chip(CHIP_NAME)
-    for name, pin in RELAY_PINS.items():
-        line = chip.get_line(pin)
-        line.request(consumer=f"climate_{name}", type=gpiod.LINE_REQ_DIR_OUT)
-        line_requests[pin] = line
-        line.set_value(1)  # OFF state
+    relay_lines = chip.get_lines(relay_pins)
+    relay_lines.request(consumer="climate", type=gpiod.LINE_REQ_DIR_OUT,
+                        default_vals=[1] * len(relay_pins))  # OFF state
 except Exception as e:
+    relay_lines = None
     print(f"Error initializing GPIO: {e}")
 
 # Load and save settings
 def load_settings():
     try:
         with open('climate_settings.json', 'r') as f:
-            return json.load(f)
+            data = json.load(f)
+        return {room: RoomSettings.from_dict(cfg) for room, cfg in data.items()}
     except:
-        return DEFAULT_SETTINGS.copy()
+        return {room: RoomSettings.from_dict(cfg) for room, cfg in DEFAULT_SETTINGS.items()}
 
 def save_settings(settings):
-    with open('climate_settings.json', 'w') as f:
-        json.dump(settings, f, indent=4)
+    # Write to a temp file and rename so a power cut never leaves a torn file
+    with open('climate_settings.json.tmp', 'w') as f:
+        json.dump({room: cfg.to_dict() for room, cfg in settings.items()}, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace('climate_settings.json.tmp', 'climate_settings.json')
 
 # Temperature reading functions
-def read_temp_raw(device_file):
-    try:
-        with open(device_file, 'r') as f:
-            return f.readlines()
-    except:
-        return None
+failed_sensors = set()
+
+def report_sensor_error(sensor_id, error):
+    # Log a failing sensor once instead of on every poll
+    if sensor_id not in failed_sensors:
+        failed_sensors.add(sensor_id)
+        print(f"Error reading sensor {sensor_id}: {error}")
 
 def read_temp(sensor_id):
-    device_file = base_dir + sensor_id + '/w1_slave'
+    device_dir = base_dir + sensor_id
+    # The w1_therm driver exposes the converted value in millidegrees
+    try:
+        with open(device_dir + '/temperature', 'r') as f:
+            return int(f.readline()) / 1000.0
+    except FileNotFoundError:
+        pass  # Older kernels only provide w1_slave
+    except (OSError, ValueError) as e:
+        report_sensor_error(sensor_id, e)
+        return None
+    
+    # Fallback: parse w1_slave once; a failed CRC is retried on the next poll
     try:
-        lines = read_temp_raw(device_file)
-        if not lines:
+        with open(device_dir + '/w1_slave', 'r') as f:
+            lines = f.readlines()
+        if len(lines) < 2 or lines[0].strip()[-3:] != 'YES':
             return None
-            
-        while lines[0].strip()[-3:] != 'YES':
-            time.sleep(0.2)
-            lines = read_temp_raw(device_file)
-            if not lines:
-                return None
-                
         equals_pos = lines[1].find('t=')
         if equals_pos != -1:
-            temp_string = lines[1][equals_pos+2:]
-            return float(temp_string) / 1000.0
-    except:
+            return float(lines[1][equals_pos+2:]) / 1000.0
+    except (OSError, ValueError) as e:
+        report_sensor_error(sensor_id, e)
         return None
     return None
 
 # Relay control
-def set_relay(pin, state):
+def set_relays(states):
+    """Apply {pin: state} (True=ON, False=OFF) to the relays in one write"""
+    if relay_lines is None:
+        print("Error controlling relays: lines not requested")
+        return False
+    new_values = dict(relay_values)
+    for pin, state in states.items():
+        new_values[pin] = 0 if state else 1  # 0=ON, 1=OFF
+    if new_values == relay_values:
+        return True  # Nothing changes, skip the ioctl
     try:
-        line = line_requests[pin]
-        line.set_value(0 if state else 1)  # 0=ON, 1=OFF
-        return True
-    except:
-        print(f"Error controlling relay on pin {pin}")
+        relay_lines.set_values([new_values[pin] for pin in relay_pins])
+    except OSError as e:
+        print(f"Error controlling relays: {e}")
         return False
+    relay_values.update(new_values)
+    return True
 
 # Main application class
 class ClimateControlApp:
     def __init__(self):
         pygame.init()
         self.width, self.height = 800, 480
-        self.screen = pygame.display.set_mode((self.width, self.height))
+        self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.HWSURFACE)
         pygame.display.set_caption("Climate Control System")
         
         self.clock = pygame.time.Clock()
@@ -110,11 +150,17 @@ class ClimateControlApp:
         self.font_medium = pygame.font.SysFont(None, 28)
         self.font_small = pygame.font.SysFont(None, 22)
         
+        self._rooms = tuple(sensor_ids.keys())
+        self._sensor_items = tuple(sensor_ids.items())
+        
         self.settings = load_settings()
+        self._settings_dirty = False
+        self._settings_changed_at = 0
         self.current_screen = "main"
         self.selected_room = None
         self.temperatures = {}
-        self.room_states = {room: {'cooling': False, 'heating': False} for room in sensor_ids.keys()}
+        self._room_color = {}
+        self.room_states = {room: {'cooling': False, 'heating': False} for room in self._rooms}
         
         # Colors
         self.colors = {
@@ -129,56 +175,147 @@ class ClimateControlApp:
             'normal': (100, 200, 100)
         }
         
-        self.last_temp_update = 0
         self.last_control_update = 0
+        self._last_interaction = time.time()
         
-    def draw_main_screen(self):
-        self.screen.fill(self.colors['background'])
+        # Button geometry
+        self.settings_btn_rects = {room: pygame.Rect(600, 80 + i * 60, 150, 40)
+                                   for i, room in enumerate(self._rooms)}
+        self.btn_min_up = pygame.Rect(300, 120, 40, 40)
+        self.btn_min_down = pygame.Rect(350, 120, 40, 40)
+        self.btn_max_up = pygame.Rect(300, 180, 40, 40)
+        self.btn_max_down = pygame.Rect(350, 180, 40, 40)
+        self.btn_heat = pygame.Rect(20, 240, 150, 60)
+        self.btn_cool = pygame.Rect(200, 240, 150, 60)
+        self.btn_back = pygame.Rect(self.width - 170, self.height - 70, 150, 60)
         
-        # Title
-        title = self.font_large.render("Climate Control System", True, self.colors['text'])
-        self.screen.blit(title, (20, 20))
+        # Rendered text surfaces
+        self._text_cache = {}
+        self._slot_cache = {}
+        self._prerender_static_text()
+        
+        # Redraw tracking: only changed regions are pushed to the display
+        self._screen_rect = self.screen.get_rect()
+        self._clock_rect = pygame.Rect(self.width // 2, 20, self.width // 2, 30)
+        self._row_rects = {room: pygame.Rect(0, 80 + i * 60, self.width, 60)
+                           for i, room in enumerate(self._rooms)}
+        self._last_time_sec = 0
+        self._last_time_str = ''
+        self._time_surf = None
+        self._dirty = True
+        self._dirty_rects = [self._screen_rect]
+        self._update_clock()
+        self._settings_btn_surface = pygame.Surface((150, 40)).convert()
+        self._settings_btn_surface.fill(self.colors['button'])
+        self._settings_btn_surface.blit(self._text(self.font_small, "Settings", self.colors['text']), (10, 10))
+        self._main_bg = self._build_main_background()
+        
+        # Sensor polling runs in the background so 1-Wire reads never block the UI
+        self._temp_lock = threading.Lock()
+        self._sensor_readings = {}
+        self._sensor_idx = 0
+        self._running = True
+        self._sensor_thread = threading.Thread(target=self._sensor_loop, daemon=True)
+        self._sensor_thread.start()
+        
+    def _text(self, font, s, color):
+        """Render text once and reuse the surface on later frames"""
+        key = (id(font), s, color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            surf = font.render(s, True, color).convert_alpha()
+            self._text_cache[key] = surf
+        return surf
+        
+    def _slot_text(self, slot, font, s, color):
+        """Render dynamic text for a screen slot, re-rendering only when it changes"""
+        cached = self._slot_cache.get(slot)
+        if cached is not None and cached[0] == s and cached[1] == color:
+            return cached[2]
+        surf = font.render(s, True, color).convert_alpha()
+        self._slot_cache[slot] = (s, color, surf)
+        return surf
+        
+    def _prerender_static_text(self):
+        text = self.colors['text']
+        self._text(self.font_large, "Climate Control System", text)
+        self._text(self.font_medium, "System Status: OK", text)
+        self._text(self.font_medium, "+", text)
+        self._text(self.font_medium, "-", text)
+        self._text(self.font_medium, "Manual Heat", text)
+        self._text(self.font_medium, "Manual Cool", text)
+        self._text(self.font_medium, "Back", text)
+        self._text(self.font_small, "Settings", text)
+        self._text(self.font_small, "Cooling", self.colors['active'])
+        self._text(self.font_small, "Heating", self.colors['active'])
+        for room in self._rooms:
+            self._text(self.font_large, f"{room} Settings", text)
+        
+    def _build_main_background(self):
+        """Pre-render the parts of the main screen that never change"""
+        bg = pygame.Surface((self.width, self.height)).convert()
+        bg.fill(self.colors['background'])
+        bg.blit(self._text(self.font_large, "Climate Control System", self.colors['text']), (20, 20))
+        for btn_rect in self.settings_btn_rects.values():
+            bg.blit(self._settings_btn_surface, btn_rect.topleft)
+        bg.blit(self._text(self.font_medium, "System Status: OK", self.colors['text']), (50, self.height - 60))
+        return bg
+        
+    def _update_clock(self):
+        """Re-render the clock only when the displayed second changes"""
+        now = int(time.time())
+        if now == self._last_time_sec:
+            return
+        self._last_time_sec = now
+        self._last_time_str = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+        self._time_surf = self.font_medium.render(self._last_time_str, True, self.colors['text']).convert_alpha()
+        if self.current_screen == "main":
+            self._invalidate(self._clock_rect)
+        
+    def _invalidate(self, rect=None):
+        """Mark a screen region (default: the whole screen) for redraw"""
+        self._dirty = True
+        self._dirty_rects.append(rect or self._screen_rect)
+        
+    def _invalidate_room(self, room):
+        if self.current_screen == "main":
+            self._invalidate(self._row_rects[room])
+        elif self.selected_room == room:
+            self._invalidate()
+        
+    def draw_main_screen(self):
+        blits = []
         
         # Time
-        time_text = self.font_medium.render(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), True, self.colors['text'])
-        self.screen.blit(time_text, (self.width - time_text.get_width() - 20, 20))
+        blits.append((self._time_surf, (self.width - self._time_surf.get_width() - 20, 20)))
         
         # Room temperatures
         y_pos = 80
         for room, temp in self.temperatures.items():
             if temp is not None:
-                # Determine color based on temperature
-                if temp > self.settings[room]['max_temp']:
-                    color = self.colors['hot']
-                elif temp < self.settings[room]['min_temp']:
-                    color = self.colors['cold']
-                else:
-                    color = self.colors['normal']
-                
                 # Room temperature
-                temp_text = self.font_medium.render(f"{room}: {temp:.1f}°C", True, color)
-                self.screen.blit(temp_text, (50, y_pos))
+                temp_text = self._slot_text(('temp', room), self.font_medium, f"{room}: {temp:.1f}°C", self._room_color[room])
+                blits.append((temp_text, (50, y_pos)))
                 
                 # Status indicators
                 if self.room_states[room]['cooling']:
-                    status = self.font_small.render("Cooling", True, self.colors['active'])
-                    self.screen.blit(status, (250, y_pos))
+                    blits.append((self._text(self.font_small, "Cooling", self.colors['active']), (250, y_pos)))
                 elif self.room_states[room]['heating']:
-                    status = self.font_small.render("Heating", True, self.colors['active'])
-                    self.screen.blit(status, (250, y_pos))
-                
-                # Settings button
-                btn_rect = pygame.Rect(600, y_pos, 150, 40)
-                pygame.draw.rect(self.screen, self.colors['button'], btn_rect)
-                btn_text = self.font_small.render("Settings", True, self.colors['text'])
-                self.screen.blit(btn_text, (btn_rect.x + 10, btn_rect.y + 10))
+                    blits.append((self._text(self.font_small, "Heating", self.colors['active']), (250, y_pos)))
                 
             y_pos += 60
-            
-        # System status
-        system_y = self.height - 60
-        system_text = self.font_medium.render("System Status: OK", True, self.colors['text'])
-        self.screen.blit(system_text, (50, system_y))
+        
+        # Restore the pre-rendered background only under dirty regions and
+        # redraw the dynamic text clipped to them
+        if self._screen_rect in self._dirty_rects:
+            regions = (self._screen_rect,)
+        else:
+            regions = self._dirty_rects
+        for region in regions:
+            self.screen.set_clip(region)
+            self.screen.blit(self._main_bg, region.topleft, region)
+            self.screen.blits(blits, doreturn=False)
+        self.screen.set_clip(None)
         
     def draw_room_settings(self):
         self.screen.fill(self.colors['background'])
@@ -188,61 +325,45 @@ class ClimateControlApp:
             
         room = self.selected_room
         temp = self.temperatures.get(room, 0)
+        text_color = self.colors['text']
         
-        # Title
-        title = self.font_large.render(f"{room} Settings", True, self.colors['text'])
-        self.screen.blit(title, (20, 20))
+        # Buttons first, labels are blitted on top of them
+        heat_color = self.colors['active'] if self.settings[room].manual_heat else self.colors['button']
+        cool_color = self.colors['active'] if self.settings[room].manual_cool else self.colors['button']
+        for color, rect in ((self.colors['button'], self.btn_min_up),
+                            (self.colors['button'], self.btn_min_down),
+                            (self.colors['button'], self.btn_max_up),
+                            (self.colors['button'], self.btn_max_down),
+                            (heat_color, self.btn_heat),
+                            (cool_color, self.btn_cool),
+                            (self.colors['button'], self.btn_back)):
+            pygame.draw.rect(self.screen, color, rect)
+        
+        plus = self._text(self.font_medium, "+", text_color)
+        minus = self._text(self.font_medium, "-", text_color)
+        blits = [
+            # Title
+            (self._text(self.font_large, f"{room} Settings", text_color), (20, 20)),
+            # Min temperature setting
+            (self._slot_text('min_temp', self.font_medium, f"Min Temp: {self.settings[room].min_temp}°C", text_color), (20, 120)),
+            (plus, (self.btn_min_up.x + 15, self.btn_min_up.y + 10)),
+            (minus, (self.btn_min_down.x + 15, self.btn_min_down.y + 10)),
+            # Max temperature setting
+            (self._slot_text('max_temp', self.font_medium, f"Max Temp: {self.settings[room].max_temp}°C", text_color), (20, 180)),
+            (plus, (self.btn_max_up.x + 15, self.btn_max_up.y + 10)),
+            (minus, (self.btn_max_down.x + 15, self.btn_max_down.y + 10)),
+            # Manual control buttons
+            (self._text(self.font_medium, "Manual Heat", text_color), (self.btn_heat.x + 10, self.btn_heat.y + 20)),
+            (self._text(self.font_medium, "Manual Cool", text_color), (self.btn_cool.x + 10, self.btn_cool.y + 20)),
+            # Back button
+            (self._text(self.font_medium, "Back", text_color), (self.btn_back.x + 40, self.btn_back.y + 20)),
+        ]
         
         # Current temperature
         if temp is not None:
-            temp_text = self.font_medium.render(f"Current: {temp:.1f}°C", True, self.colors['text'])
-            self.screen.blit(temp_text, (20, 70))
-        
-        # Min temperature setting
-        min_text = self.font_medium.render(f"Min Temp: {self.settings[room]['min_temp']}°C", True, self.colors['text'])
-        self.screen.blit(min_text, (20, 120))
-        
-        # Min temp buttons
-        min_up_btn = pygame.Rect(300, 120, 40, 40)
-        min_down_btn = pygame.Rect(350, 120, 40, 40)
-        
-        pygame.draw.rect(self.screen, self.colors['button'], min_up_btn)
-        pygame.draw.rect(self.screen, self.colors['button'], min_down_btn)
-        
-        self.screen.blit(self.font_medium.render("+", True, self.colors['text']), (min_up_btn.x + 15, min_up_btn.y + 10))
-        self.screen.blit(self.font_medium.render("-", True, self.colors['text']), (min_down_btn.x + 15, min_down_btn.y + 10))
-        
-        # Max temperature setting
-        max_text = self.font_medium.render(f"Max Temp: {self.settings[room]['max_temp']}°C", True, self.colors['text'])
-        self.screen.blit(max_text, (20, 180))
-        
-        # Max temp buttons
-        max_up_btn = pygame.Rect(300, 180, 40, 40)
-        max_down_btn = pygame.Rect(350, 180, 40, 40)
-        
-        pygame.draw.rect(self.screen, self.colors['button'], max_up_btn)
-        pygame.draw.rect(self.screen, self.colors['button'], max_down_btn)
-        
-        self.screen.blit(self.font_medium.render("+", True, self.colors['text']), (max_up_btn.x + 15, max_up_btn.y + 10))
-        self.screen.blit(self.font_medium.render("-", True, self.colors['text']), (max_down_btn.x + 15, max_down_btn.y + 10))
+            blits.append((self._slot_text('current', self.font_medium, f"Current: {temp:.1f}°C", text_color), (20, 70)))
         
-        # Manual control buttons
-        heat_btn = pygame.Rect(20, 240, 150, 60)
-        cool_btn = pygame.Rect(200, 240, 150, 60)
-        
-        heat_color = self.colors['active'] if self.settings[room]['manual_heat'] else self.colors['button']
-        cool_color = self.colors['active'] if self.settings[room]['manual_cool'] else self.colors['button']
-        
-        pygame.draw.rect(self.screen, heat_color, heat_btn)
-        pygame.draw.rect(self.screen, cool_color, cool_btn)
-        
-        self.screen.blit(self.font_medium.render("Manual Heat", True, self.colors['text']), (heat_btn.x + 10, heat_btn.y + 20))
-        self.screen.blit(self.font_medium.render("Manual Cool", True, self.colors['text']), (cool_btn.x + 10, cool_btn.y + 20))
-        
-        # Back button
-        back_btn = pygame.Rect(self.width - 170, self.height - 70, 150, 60)
-        pygame.draw.rect(self.screen, self.colors['button'], back_btn)
-        self.screen.blit(self.font_medium.render("Back", True, self.colors['text']), (back_btn.x + 40, back_btn.y + 20))
+        self.screen.blits(blits, doreturn=False)
         
     def handle_events(self):
         for event in pygame.event.get():
@@ -251,17 +372,16 @@ class ClimateControlApp:
                 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
+                self._last_interaction = time.time()
+                self._invalidate()
                 
                 if self.current_screen == "main":
                     # Check if any settings button was clicked
-                    y_pos = 80
-                    for room in sensor_ids.keys():
-                        btn_rect = pygame.Rect(600, y_pos, 150, 40)
+                    for room, btn_rect in self.settings_btn_rects.items():
                         if btn_rect.collidepoint(pos):
                             self.selected_room = room
                             self.current_screen = "settings"
                             break
-                        y_pos += 60
                         
                 elif self.current_screen == "settings":
                     if not self.selected_room:
@@ -270,107 +390,160 @@ class ClimateControlApp:
                     room = self.selected_room
                     
                     # Min temperature buttons
-                    min_up_btn = pygame.Rect(300, 120, 40, 40)
-                    min_down_btn = pygame.Rect(350, 120, 40, 40)
-                    
-                    if min_up_btn.collidepoint(pos):
-                        self.settings[room]['min_temp'] += 1
-                    elif min_down_btn.collidepoint(pos):
-                        self.settings[room]['min_temp'] -= 1
+                    if self.btn_min_up.collidepoint(pos):
+                        self.settings[room].min_temp += 1
+                        self._mark_settings_changed()
+                    elif self.btn_min_down.collidepoint(pos):
+                        self.settings[room].min_temp -= 1
+                        self._mark_settings_changed()
                     
                     # Max temperature buttons
-                    max_up_btn = pygame.Rect(300, 180, 40, 40)
-                    max_down_btn = pygame.Rect(350, 180, 40, 40)
-                    
-                    if max_up_btn.collidepoint(pos):
-                        self.settings[room]['max_temp'] += 1
-                    elif max_down_btn.collidepoint(pos):
-                        self.settings[room]['max_temp'] -= 1
+                    if self.btn_max_up.collidepoint(pos):
+                        self.settings[room].max_temp += 1
+                        self._mark_settings_changed()
+                    elif self.btn_max_down.collidepoint(pos):
+                        self.settings[room].max_temp -= 1
+                        self._mark_settings_changed()
                     
                     # Manual control buttons
-                    heat_btn = pygame.Rect(20, 240, 150, 60)
-                    cool_btn = pygame.Rect(200, 240, 150, 60)
-                    
-                    if heat_btn.collidepoint(pos):
-                        self.settings[room]['manual_heat'] = not self.settings[room]['manual_heat']
-                        if self.settings[room]['manual_heat']:
-                            self.settings[room]['manual_cool'] = False
-                    elif cool_btn.collidepoint(pos):
-                        self.settings[room]['manual_cool'] = not self.settings[room]['manual_cool']
-                        if self.settings[room]['manual_cool']:
-                            self.settings[room]['manual_heat'] = False
+                    if self.btn_heat.collidepoint(pos):
+                        self.settings[room].manual_heat = not self.settings[room].manual_heat
+                        if self.settings[room].manual_heat:
+                            self.settings[room].manual_cool = False
+                        self._mark_settings_changed()
+                    elif self.btn_cool.collidepoint(pos):
+                        self.settings[room].manual_cool = not self.settings[room].manual_cool
+                        if self.settings[room].manual_cool:
+                            self.settings[room].manual_heat = False
+                        self._mark_settings_changed()
                     
                     # Back button
-                    back_btn = pygame.Rect(self.width - 170, self.height - 70, 150, 60)
-                    if back_btn.collidepoint(pos):
+                    if self.btn_back.collidepoint(pos):
                         self.current_screen = "main"
-                        save_settings(self.settings)
         
         return True
         
+    def _mark_settings_changed(self):
+        self._settings_dirty = True
+        self._settings_changed_at = time.time()
+        self._update_room_color(self.selected_room)
+        
+    def _update_room_color(self, room):
+        """Recompute a room's temperature color when its reading or limits change"""
+        temp = self.temperatures.get(room)
+        if temp is None:
+            color = None
+        elif temp > self.settings[room].max_temp:
+            color = self.colors['hot']
+        elif temp < self.settings[room].min_temp:
+            color = self.colors['cold']
+        else:
+            color = self.colors['normal']
+        if self._room_color.get(room) != color:
+            self._room_color[room] = color
+            self._invalidate_room(room)
+        
+    def save_settings_if_idle(self):
+        """Persist settings once they have been left alone for 30 seconds"""
+        if self._settings_dirty and time.time() - self._settings_changed_at >= 30:
+            try:
+                save_settings(self.settings)
+            except OSError as e:
+                # Keep the settings dirty and retry after another idle period
+                print(f"Error saving settings: {e}")
+                self._settings_changed_at = time.time()
+                return
+            self._settings_dirty = False
+            
+    def _sensor_loop(self):
+        # Round-robin: one sensor per 1 s step, so every room refreshes about
+        # every 5 s but no single pass blocks on more than one conversion.
+        # The ~0.75 s conversion counts towards the step, not on top of it.
+        sensors = self._sensor_items
+        while self._running:
+            started = time.monotonic()
+            room, sensor_id = sensors[self._sensor_idx]
+            temp = read_temp(sensor_id)
+            with self._temp_lock:
+                self._sensor_readings[room] = temp
+            self._sensor_idx = (self._sensor_idx + 1) % len(sensors)
+            time.sleep(max(0, 1 - (time.monotonic() - started)))
+            
     def update_temperatures(self):
-        current_time = time.time()
-        if current_time - self.last_temp_update >= 5:  # Update every 5 seconds
-            for room, sensor_id in sensor_ids.items():
-                self.temperatures[room] = read_temp(sensor_id)
-            self.last_temp_update = current_time
+        """Pick up the latest readings published by the sensor thread"""
+        with self._temp_lock:
+            readings = dict(self._sensor_readings)
+        for room, temp in readings.items():
+            if room not in self.temperatures or self.temperatures[room] != temp:
+                self.temperatures[room] = temp
+                self._update_room_color(room)
+                self._invalidate_room(room)
             
     def control_climate(self):
         current_time = time.time()
         if current_time - self.last_control_update >= 10:  # Control every 10 seconds
-            for room, sensor_id in sensor_ids.items():
+            # Pass 1: decide what each room needs without touching GPIO
+            desired = {}
+            for room in self._rooms:
+                st = self.room_states[room]
+                if st['heating']:
+                    current = 'heat'
+                elif st['cooling']:
+                    current = 'cool'
+                else:
+                    current = 'off'
+                    
                 temp = self.temperatures.get(room)
                 if temp is None:
+                    desired[room] = current
                     continue
                     
-                relay_pin = RELAY_PINS[room]
-                min_temp = self.settings[room]['min_temp']
-                max_temp = self.settings[room]['max_temp']
+                cfg = self.settings[room]
+                min_temp = cfg.min_temp
+                max_temp = cfg.max_temp
                 
                 # Manual control has priority
-                if self.settings[room]['manual_heat']:
-                    if not self.room_states[room]['heating']:
-                        if (set_relay(relay_pin, True) and 
-                            set_relay(RELAY_PINS['heater_vent'], True) and 
-                            set_relay(RELAY_PINS['supply'], True)):
-                            self.room_states[room]['heating'] = True
-                            self.room_states[room]['cooling'] = False
-                
-                elif self.settings[room]['manual_cool']:
-                    if not self.room_states[room]['cooling']:
-                        if set_relay(relay_pin, True) and set_relay(RELAY_PINS['ac'], True):
-                            self.room_states[room]['cooling'] = True
-                            self.room_states[room]['heating'] = False
-                
-                # Automatic control
-                elif temp > max_temp and not self.room_states[room]['cooling']:
-                    if set_relay(relay_pin, True) and set_relay(RELAY_PINS['ac'], True):
-                        self.room_states[room]['cooling'] = True
-                        self.room_states[room]['heating'] = False
+                if cfg.manual_heat:
+                    desired[room] = 'heat'
+                elif cfg.manual_cool:
+                    desired[room] = 'cool'
                     
-                elif temp <= max_temp - 3 and self.room_states[room]['cooling']:
-                    if set_relay(relay_pin, False):
-                        self.room_states[room]['cooling'] = False
-                    
-                elif temp < min_temp and not self.room_states[room]['heating']:
-                    if (set_relay(relay_pin, True) and 
-                        set_relay(RELAY_PINS['heater_vent'], True) and 
-                        set_relay(RELAY_PINS['supply'], True)):
-                        self.room_states[room]['heating'] = True
-                        self.room_states[room]['cooling'] = False
+                # Automatic control
+                elif temp > max_temp and current != 'cool':
+                    desired[room] = 'cool'
+                elif temp <= max_temp - 3 and current == 'cool':
+                    desired[room] = 'off'
+                elif temp < min_temp and current != 'heat':
+                    desired[room] = 'heat'
+                elif temp >= min_temp + 3 and current == 'heat':
+                    desired[room] = 'off'
+                else:
+                    desired[room] = current
                     
-                elif temp >= min_temp + 3 and self.room_states[room]['heating']:
-                    if set_relay(relay_pin, False):
-                        self.room_states[room]['heating'] = False
+            any_heat = any(mode == 'heat' for mode in desired.values())
+            any_cool = any(mode == 'cool' for mode in desired.values())
             
-            # Turn off AC if no room needs cooling
-            if all(not state['cooling'] for state in self.room_states.values()):
-                set_relay(RELAY_PINS['ac'], False)
-                
-            # Turn off heater vent and supply if no room needs heating
-            if all(not state['heating'] for state in self.room_states.values()):
-                set_relay(RELAY_PINS['heater_vent'], False)
-                set_relay(RELAY_PINS['supply'], False)
+            # Pass 2: collect every relay value and flush them in one write
+            pending = {RELAY_PINS[room]: mode != 'off' for room, mode in desired.items()}
+            pending[RELAY_PINS['ac']] = any_cool
+            pending[RELAY_PINS['heater_vent']] = any_heat
+            pending[RELAY_PINS['supply']] = any_heat
+            if set_relays(pending):
+                # Record each room's new state now that its relays were switched
+                for room, mode in desired.items():
+                    st = self.room_states[room]
+                    if mode == 'heat' and not st['heating']:
+                        st['heating'] = True
+                        st['cooling'] = False
+                        self._invalidate_room(room)
+                    elif mode == 'cool' and not st['cooling']:
+                        st['cooling'] = True
+                        st['heating'] = False
+                        self._invalidate_room(room)
+                    elif mode == 'off' and (st['heating'] or st['cooling']):
+                        st['heating'] = False
+                        st['cooling'] = False
+                        self._invalidate_room(room)
                 
             self.last_control_update = current_time
             
@@ -381,22 +554,38 @@ class ClimateControlApp:
             
             self.update_temperatures()
             self.control_climate()
+            self.save_settings_if_idle()
             
-            if self.current_screen == "main":
-                self.draw_main_screen()
-            elif self.current_screen == "settings":
-                self.draw_room_settings()
+            # Clock ticks once per second
+            self._update_clock()
+            
+            if self._dirty:
+                if self.current_screen == "main":
+                    self.draw_main_screen()
+                elif self.current_screen == "settings":
+                    self.draw_room_settings()
+                pygame.display.update(self._dirty_rects)
+                self._dirty = False
+                self._dirty_rects = []
                 
-            pygame.display.flip()
-            self.clock.tick(30)
+            # Frame-accurate 30 FPS briefly after input; otherwise sleep at 2 FPS
+            if time.time() - self._last_interaction < 1.0:
+                self.clock.tick_busy_loop(30)
+            else:
+                self.clock.tick(2)
             
         # Cleanup
-        save_settings(self.settings)
-        for pin, line in line_requests.items():
+        self._running = False
+        if self._settings_dirty:
+            try:
+                save_settings(self.settings)
+            except OSError as e:
+                print(f"Error saving settings: {e}")
+        if relay_lines is not None:
             try:
-                line.set_value(1)  # Set to OFF state
-                line.release()
-            except:
+                relay_lines.set_values([1] * len(relay_pins))  # Set to OFF state
+                relay_lines.release()
+            except OSError:
                 pass
         if chip:
             chip.close()
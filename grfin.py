@@ -4,8 +4,18 @@ import time
 import os
 import json
 import sys
+import threading
+import mmap
+import atexit
+import signal
+import struct
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to the standard json module
+
 # Define relay pins (BCM numbering)
 RELAY_PINS = {
     'ac': 17,          # Кондиционер
@@ -27,6 +37,18 @@ sensor_ids = {
     'room4': '28-0b2396b8f8d6',
     'room5': '28-0b23965334fa'
 }
+ROOM_LIST = tuple(sensor_ids.keys())
+DEVICE_FILES = {room: f"{base_dir}{sid}/w1_slave" for room, sid in sensor_ids.items()}
+
+# Device files that failed to open, with the time of the failure. They are
+# skipped until SENSOR_RETRY_INTERVAL passes, so a hot-plugged sensor comes back.
+failed_device_files = {}
+SENSOR_RETRY_INTERVAL = 60
+
+# w1-therm bulk conversion: one convert-T for every sensor on the bus
+W1_BULK_READ = base_dir + 'w1_bus_master1/therm_bulk_read'
+SENSOR_RESOLUTION = 10  # 0.25 °C steps, plenty for the 3 °C hysteresis
+CONVERSION_TIME = {9: 0.094, 10: 0.188, 11: 0.375, 12: 0.75}  # seconds
 
 # Default temperature settings
 DEFAULT_SETTINGS = {
@@ -40,6 +62,7 @@ DEFAULT_SETTINGS = {
 # Initialize GPIO with gpiozero
 relay_devices = {}
 gpio_initialized = False
+relay_state = {name: False for name in RELAY_PINS}  # Last state set on each relay
 
 try:
     # Initialize all relay devices
@@ -55,87 +78,172 @@ except Exception as e:
     print(f"Error initializing GPIO with gpiozero: {e}")
     print("Running in simulation mode without GPIO control")
 
+# Direct register writes through /dev/gpiomem (BCM2835-family SoCs only, not Pi 5).
+# gpiozero still configures the pins as outputs; this only replaces on()/off().
+USE_GPIOMEM = False
+GPSET0 = 0x1C  # Writing 1 drives the pin high
+GPCLR0 = 0x28  # Writing 1 drives the pin low
+gpio_mm = None
+relay_masks = {name: 1 << pin for name, pin in RELAY_PINS.items()}
+
+if USE_GPIOMEM and gpio_initialized:
+    try:
+        with open('/dev/gpiomem', 'r+b') as f:
+            gpio_mm = mmap.mmap(f.fileno(), 4096)
+        print("GPIO registers mapped from /dev/gpiomem")
+    except OSError as e:
+        print(f"Error mapping /dev/gpiomem, using gpiozero: {e}")
+
 # Load and save settings
 def load_settings():
     try:
+        if orjson is not None:
+            with open('climate_settings.json', 'rb') as f:
+                return orjson.loads(f.read())
         with open('climate_settings.json', 'r') as f:
             return json.load(f)
-    except:
+    except (OSError, ValueError):  # Covers both JSONDecodeErrors and UnicodeDecodeError
         return DEFAULT_SETTINGS.copy()
 
 def save_settings(settings):
-    with open('climate_settings.json', 'w') as f:
-        json.dump(settings, f, indent=4)
+    # Write to a temp file and rename so a power cut never leaves a torn file
+    if orjson is not None:
+        with open('climate_settings.json.tmp', 'wb') as f:
+            f.write(orjson.dumps(settings, option=orjson.OPT_INDENT_2))
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        with open('climate_settings.json.tmp', 'w') as f:
+            json.dump(settings, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace('climate_settings.json.tmp', 'climate_settings.json')
 
 # Temperature reading functions
-def read_temp_raw(device_file):
+def read_temp(device_file):
+    failed_at = failed_device_files.get(device_file)
+    if failed_at is not None:
+        if time.time() - failed_at < SENSOR_RETRY_INTERVAL:
+            return None
+        del failed_device_files[device_file]
+    if not os.path.exists(device_file):
+        failed_device_files[device_file] = time.time()
+        return None
     try:
         with open(device_file, 'r') as f:
-            return f.readlines()
-    except:
+            data = f.read()
+    except OSError:
+        failed_device_files[device_file] = time.time()
+        return None
+    
+    # A failed CRC is retried on the next poll instead of re-reading here
+    if 'YES' not in data:
+        return None
+    equals_pos = data.rfind('t=')
+    if equals_pos == -1:
         return None
-
-def read_temp(sensor_id):
-    device_file = base_dir + sensor_id + '/w1_slave'
     try:
-        lines = read_temp_raw(device_file)
-        if not lines:
-            return None
-            
-        while lines[0].strip()[-3:] != 'YES':
-            time.sleep(0.2)
-            lines = read_temp_raw(device_file)
-            if not lines:
-                return None
-                
-        equals_pos = lines[1].find('t=')
-        if equals_pos != -1:
-            temp_string = lines[1][equals_pos+2:]
-            return float(temp_string) / 1000.0
-    except:
+        return int(data[equals_pos+2:]) / 1000.0
+    except ValueError:
         return None
-    return None
+
+def set_sensor_resolution(sensor_id, bits):
+    try:
+        with open(base_dir + sensor_id + '/resolution', 'w') as f:
+            f.write(str(bits))
+        return True
+    except OSError:
+        return False
+
+def trigger_bulk_conversion():
+    """Start a temperature conversion on all sensors at once"""
+    try:
+        with open(W1_BULK_READ, 'w') as f:
+            f.write('trigger')
+        return True
+    except OSError:
+        return False
 
 # Relay control
-def set_relay(relay_name, state):
-    """Set relay state (True=ON, False=OFF)"""
+def set_relay(relay_name, state, force=False, log=print):
+    """Set relay state (True=ON, False=OFF)
+    
+    Does nothing if the relay is already in that state, unless force=True.
+    Messages go to log, so the control cycle can buffer them with its own.
+    """
+    if not force and relay_state[relay_name] == state:
+        return True
+        
     if not gpio_initialized:
-        print(f"GPIO not initialized - simulating {relay_name} set to {'ON' if state else 'OFF'}")
+        log(f"GPIO not initialized - simulating {relay_name} set to {'ON' if state else 'OFF'}")
+        relay_state[relay_name] = state
         return True
         
     try:
-        relay = relay_devices[relay_name]
-        if state:
-            relay.on()
+        if gpio_mm is not None:
+            # Relays are active-low: ON clears the pin, OFF sets it
+            struct.pack_into('<I', gpio_mm, GPCLR0 if state else GPSET0, relay_masks[relay_name])
         else:
-            relay.off()
+            relay = relay_devices[relay_name]
+            if state:
+                relay.on()
+            else:
+                relay.off()
         
-        print(f"[RELAY] {relay_name} set to {'ON' if state else 'OFF'}")
+        relay_state[relay_name] = state
+        log(f"[RELAY] {relay_name} set to {'ON' if state else 'OFF'}")
         return True
     except Exception as e:
-        print(f"Error controlling relay {relay_name}: {e}")
+        log(f"Error controlling relay {relay_name}: {e}")
         return False
 
 # Test all relays
+relay_test_stop = threading.Event()  # Set on shutdown to abort the relay test
+relay_test_thread = None
+
 def test_all_relays():
     """Test all relays by turning them on and off sequentially"""
     print("Testing all relays...")
     
     # Turn all relays off first
     for name in relay_devices:
-        set_relay(name, False)
-    time.sleep(1)
+        set_relay(name, False, force=True)
+    if relay_test_stop.wait(1):
+        return
     
     # Test each relay one by one
     for name in relay_devices:
         print(f"Testing {name}...")
-        set_relay(name, True)  # Turn on
-        time.sleep(2)  # Keep on for 2 seconds
-        set_relay(name, False)  # Turn off
-        time.sleep(1)  # Pause between relays
+        set_relay(name, True, force=True)  # Turn on
+        stopped = relay_test_stop.wait(2)  # Keep on for 2 seconds
+        set_relay(name, False, force=True)  # Turn off
+        if stopped or relay_test_stop.wait(1):  # Pause between relays
+            return
     
     print("Relay test completed")
 
+def start_relay_test():
+    """Run test_all_relays in a daemon thread so the UI starts immediately"""
+    global relay_test_thread
+    relay_test_thread = threading.Thread(target=test_all_relays, daemon=True)
+    relay_test_thread.start()
+    return relay_test_thread
+
+def shutdown_relays():
+    """Turn every relay off and release the GPIO pins"""
+    # Stop the relay test first so it cannot switch a relay back on
+    relay_test_stop.set()
+    if relay_test_thread is not None:
+        relay_test_thread.join(timeout=5)
+    for name in relay_devices:
+        set_relay(name, False, force=True)
+    for relay in relay_devices.values():
+        relay.close()
+
+# Relays must end up off however the process exits (normal exit, Ctrl+C or SIGTERM)
+atexit.register(shutdown_relays)
+signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
 # Main application class
 class ClimateControlApp:
     def __init__(self):
@@ -150,10 +258,14 @@ class ClimateControlApp:
         self.font_small = pygame.font.SysFont(None, 22)
         
         self.settings = load_settings()
+        self._settings_dirty = False
+        self._settings_hash = hash(json.dumps(self.settings, sort_keys=True))
         self.current_screen = "main"
         self.selected_room = None
         self.temperatures = {}
-        self.room_states = {room: {'cooling': False, 'heating': False} for room in sensor_ids.keys()}
+        self.room_states = {room: {'cooling': False, 'heating': False} for room in ROOM_LIST}
+        self._cooling_count = 0  # Rooms currently cooling
+        self._heating_count = 0  # Rooms currently heating
         
         # Colors
         self.colors = {
@@ -168,11 +280,58 @@ class ClimateControlApp:
             'normal': (100, 200, 100)
         }
         
-        self.last_temp_update = 0
         self.last_control_update = 0
-        
-        # Test relays on startup
-        test_all_relays()
+        self._log_buf = []
+        self._now_str = ''
+        
+        # Button geometry
+        self.main_btns = {room: pygame.Rect(600, 80 + i * 60, 150, 40)
+                          for i, room in enumerate(ROOM_LIST)}
+        self.settings_btns = {
+            'min_up': pygame.Rect(300, 160, 40, 40),
+            'min_down': pygame.Rect(350, 160, 40, 40),
+            'max_up': pygame.Rect(300, 220, 40, 40),
+            'max_down': pygame.Rect(350, 220, 40, 40),
+            'heat': pygame.Rect(20, 280, 150, 60),
+            'cool': pygame.Rect(200, 280, 150, 60),
+            'back': pygame.Rect(self.width - 170, self.height - 70, 150, 60),
+        }
+        self.status_indicator = pygame.Rect(200, 115, 20, 20)
+        
+        # Text surfaces: fixed labels are rendered once, dynamic ones on change
+        self._static = self._build_static_text()
+        self._slot_cache = {}
+        
+        # Redraw only the regions whose content changed
+        self._screen_rect = self.screen.get_rect()
+        self._clock_rect = pygame.Rect(self.width // 2, 20, self.width // 2, 30)
+        self._row_rects = {room: pygame.Rect(0, 80 + i * 60, self.width, 60)
+                           for i, room in enumerate(ROOM_LIST)}
+        self._system_rect = pygame.Rect(0, self.height - 60, self.width, 40)
+        self._dirty_rects = [self._screen_rect]
+        self._last_clock_sec = 0
+        self._time_str = ''
+        self._time_surf = None
+        self._bg_surface = self._build_background()
+        
+        # Start with every relay off; the slow sequential test is opt-in and runs
+        # in the background, with climate control paused until it finishes.
+        for name in relay_devices:
+            set_relay(name, False, force=True)
+        self._relay_test = None
+        if '--test-relays' in sys.argv:
+            self._relay_test = start_relay_test()
+        
+        # Poll sensors in the background so slow 1-Wire reads never block the UI.
+        # Apart from the startup test, relays are only driven from the main thread.
+        self._temp_lock = threading.Lock()
+        self._latest_temps = {}
+        self._bulk_read = os.path.exists(W1_BULK_READ)
+        resolution_set = [set_sensor_resolution(sid, SENSOR_RESOLUTION) for sid in sensor_ids.values()]
+        self._conversion_time = CONVERSION_TIME[SENSOR_RESOLUTION if all(resolution_set) else 12]
+        self._stop = threading.Event()
+        self._temp_thread = threading.Thread(target=self._temp_worker, daemon=True)
+        self._temp_thread.start()
         
     def get_room_status_text(self, room):
         """Get text description of room status"""
@@ -212,74 +371,112 @@ class ClimateControlApp:
             else:
                 return self.colors['normal']
         
-    def draw_main_screen(self):
-        self.screen.fill(self.colors['background'])
+    def _build_static_text(self):
+        """Render every fixed label once"""
+        text = self.colors['text']
+        return {
+            'title': self.font_large.render("Climate Control System", True, text),
+            'settings_btn': self.font_small.render("Settings", True, text),
+            'plus': self.font_medium.render("+", True, text),
+            'minus': self.font_medium.render("-", True, text),
+            'manual_heat_btn': self.font_medium.render("Ручной обогрев", True, text),
+            'manual_cool_btn': self.font_medium.render("Ручное охлаждение", True, text),
+            'back': self.font_medium.render("Назад", True, (255, 255, 255)),
+            'too_hot': self.font_small.render("TOO HOT", True, self.colors['hot']),
+            'too_cold': self.font_small.render("TOO COLD", True, self.colors['cold']),
+            'normal': self.font_small.render("NORMAL", True, self.colors['normal']),
+            'cooling': self.font_small.render("❄️ Cooling", True, (0, 0, 255)),
+            'heating': self.font_small.render("🔥 Heating", True, (255, 0, 0)),
+            'manual_heat': self.font_small.render("🔧 Manual Heat", True, (255, 165, 0)),
+            'manual_cool': self.font_small.render("🔧 Manual Cool", True, (255, 165, 0)),
+            'idle': self.font_medium.render("System Status: Idle", True, text),
+            'no_data': {room: self.font_medium.render(f"{room}: No data", True, self.colors['inactive'])
+                        for room in ROOM_LIST},
+            'room_titles': {room: self.font_large.render(f"{room} Settings", True, text)
+                            for room in ROOM_LIST},
+        }
+        
+    def _slot_text(self, slot, font, text, color):
+        """Render dynamic text for a screen slot, re-rendering only when it changes"""
+        cached = self._slot_cache.get(slot)
+        if cached is not None and cached[0] == text and cached[1] == color:
+            return cached[2]
+        surf = font.render(text, True, color)
+        self._slot_cache[slot] = (text, color, surf)
+        return surf
+        
+    def _build_background(self):
+        """Render the static chrome of the main screen once"""
+        bg = pygame.Surface((self.width, self.height))
+        bg.fill(self.colors['background'])
         
         # Title
-        title = self.font_large.render("Climate Control System", True, self.colors['text'])
-        self.screen.blit(title, (20, 20))
+        bg.blit(self._static['title'], (20, 20))
+        
+        # Settings buttons
+        for btn_rect in self.main_btns.values():
+            pygame.draw.rect(bg, self.colors['button'], btn_rect)
+            bg.blit(self._static['settings_btn'], (btn_rect.x + 10, btn_rect.y + 10))
+        return bg
+        
+    def _invalidate(self, rect=None):
+        """Mark a screen region (default: the whole screen) for redraw"""
+        self._dirty_rects.append(rect or self._screen_rect)
         
-        # Time
-        time_text = self.font_medium.render(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), True, self.colors['text'])
-        self.screen.blit(time_text, (self.width - time_text.get_width() - 20, 20))
+    def _invalidate_room(self, room):
+        if self.current_screen == "main":
+            self._invalidate(self._row_rects[room])
+        elif self.selected_room == room:
+            self._invalidate()
+        
+    def draw_main_screen(self):
+        static = self._static
+        blits = []
+        
+        # Time, rendered by run() once per second
+        time_text = self._time_surf
+        blits.append((time_text, (self.width - time_text.get_width() - 20, 20)))
         
         # Room temperatures and status
         y_pos = 80
-        for room in sensor_ids.keys():
+        for room in ROOM_LIST:
             temp = self.temperatures.get(room)
+            s = self.settings[room]
+            rs = self.room_states[room]
             
             # Determine color based on temperature
             if temp is not None:
-                if temp > self.settings[room]['max_temp']:
+                if temp > s['max_temp']:
                     color = self.colors['hot']
-                    status = "TOO HOT"
-                elif temp < self.settings[room]['min_temp']:
+                    status = 'too_hot'
+                elif temp < s['min_temp']:
                     color = self.colors['cold']
-                    status = "TOO COLD"
+                    status = 'too_cold'
                 else:
                     color = self.colors['normal']
-                    status = "NORMAL"
+                    status = 'normal'
                 
                 # Room temperature
-                temp_text = self.font_medium.render(f"{room}: {temp:.1f}°C", True, color)
-                self.screen.blit(temp_text, (50, y_pos))
+                blits.append((self._slot_text(('temp', room), self.font_medium, f"{room}: {temp:.1f}°C", color), (50, y_pos)))
                 
                 # Temperature status
-                status_text = self.font_small.render(status, True, color)
-                self.screen.blit(status_text, (250, y_pos))
+                blits.append((static[status], (250, y_pos)))
                 
                 # System status indicators
                 status_y = y_pos + 25
-                if self.room_states[room]['cooling']:
-                    cooling_text = self.font_small.render("❄️ Cooling", True, (0, 0, 255))
-                    self.screen.blit(cooling_text, (250, status_y))
-                elif self.room_states[room]['heating']:
-                    heating_text = self.font_small.render("🔥 Heating", True, (255, 0, 0))
-                    self.screen.blit(heating_text, (250, status_y))
+                if rs['cooling']:
+                    blits.append((static['cooling'], (250, status_y)))
+                elif rs['heating']:
+                    blits.append((static['heating'], (250, status_y)))
                 
                 # Manual mode indicators
-                if self.settings[room]['manual_heat']:
-                    manual_text = self.font_small.render("🔧 Manual Heat", True, (255, 165, 0))
-                    self.screen.blit(manual_text, (400, y_pos))
-                elif self.settings[room]['manual_cool']:
-                    manual_text = self.font_small.render("🔧 Manual Cool", True, (255, 165, 0))
-                    self.screen.blit(manual_text, (400, y_pos))
-                
-                # Settings button
-                btn_rect = pygame.Rect(600, y_pos, 150, 40)
-                pygame.draw.rect(self.screen, self.colors['button'], btn_rect)
-                btn_text = self.font_small.render("Settings", True, self.colors['text'])
-                self.screen.blit(btn_text, (btn_rect.x + 10, btn_rect.y + 10))
+                if s['manual_heat']:
+                    blits.append((static['manual_heat'], (400, y_pos)))
+                elif s['manual_cool']:
+                    blits.append((static['manual_cool'], (400, y_pos)))
             else:
                 # No temperature data
-                error_text = self.font_medium.render(f"{room}: No data", True, self.colors['inactive'])
-                self.screen.blit(error_text, (50, y_pos))
-                
-                # Settings button
-                btn_rect = pygame.Rect(600, y_pos, 150, 40)
-                pygame.draw.rect(self.screen, self.colors['button'], btn_rect)
-                btn_text = self.font_small.render("Settings", True, self.colors['text'])
-                self.screen.blit(btn_text, (btn_rect.x + 10, btn_rect.y + 10))
+                blits.append((static['no_data'][room], (50, y_pos)))
             
             y_pos += 60
             
@@ -291,14 +488,26 @@ class ClimateControlApp:
                 active_rooms.append(room)
         
         if active_rooms:
-            status_text = f"Active: {', '.join(active_rooms)}"
+            system_text = self._slot_text('system', self.font_medium, f"Active: {', '.join(active_rooms)}", self.colors['text'])
         else:
-            status_text = "System Status: Idle"
+            system_text = static['idle']
+        blits.append((system_text, (50, system_y)))
         
-        system_text = self.font_medium.render(status_text, True, self.colors['text'])
-        self.screen.blit(system_text, (50, system_y))
+        # Repaint only the dirty regions: restore the background under each
+        # one, then draw the dynamic text clipped to it
+        if self._screen_rect in self._dirty_rects:
+            regions = (self._screen_rect,)
+        else:
+            regions = self._dirty_rects
+        for region in regions:
+            self.screen.set_clip(region)
+            self.screen.blit(self._bg_surface, region.topleft, region)
+            for surf, pos in blits:
+                self.screen.blit(surf, pos)
+        self.screen.set_clip(None)
         
     def draw_room_settings(self):
+        static = self._static
         self.screen.fill(self.colors['background'])
         
         if not self.selected_room:
@@ -308,54 +517,53 @@ class ClimateControlApp:
         temp = self.temperatures.get(room, 0)
         
         # Title
-        title = self.font_large.render(f"{room} Settings", True, self.colors['text'])
-        self.screen.blit(title, (20, 20))
+        self.screen.blit(static['room_titles'][room], (20, 20))
         
         # Current temperature
         if temp is not None:
-            temp_text = self.font_medium.render(f"Текущая: {temp:.1f}°C", True, self.colors['text'])
+            temp_text = self._slot_text('current', self.font_medium, f"Текущая: {temp:.1f}°C", self.colors['text'])
             self.screen.blit(temp_text, (20, 70))
         
         # Room status
-        status_text = self.font_medium.render(f"Статус: {self.get_room_status_text(room)}", True, self.get_room_status_color(room))
+        status_color = self.get_room_status_color(room)
+        status_text = self._slot_text('status', self.font_medium, f"Статус: {self.get_room_status_text(room)}", status_color)
         self.screen.blit(status_text, (20, 110))
         
         # Status indicator
-        status_indicator_size = 20
-        status_indicator = pygame.Rect(200, 115, status_indicator_size, status_indicator_size)
-        pygame.draw.rect(self.screen, self.get_room_status_color(room), status_indicator)
+        pygame.draw.rect(self.screen, status_color, self.status_indicator)
         
         # Min temperature setting
-        min_text = self.font_medium.render(f"Мин. темп.: {self.settings[room]['min_temp']}°C", True, self.colors['text'])
+        min_text = self._slot_text('min_temp', self.font_medium, f"Мин. темп.: {self.settings[room]['min_temp']}°C", self.colors['text'])
         self.screen.blit(min_text, (20, 160))
         
         # Min temp buttons
-        min_up_btn = pygame.Rect(300, 160, 40, 40)
-        min_down_btn = pygame.Rect(350, 160, 40, 40)
+        btns = self.settings_btns
+        min_up_btn = btns['min_up']
+        min_down_btn = btns['min_down']
         
         pygame.draw.rect(self.screen, self.colors['button'], min_up_btn)
         pygame.draw.rect(self.screen, self.colors['button'], min_down_btn)
         
-        self.screen.blit(self.font_medium.render("+", True, self.colors['text']), (min_up_btn.x + 15, min_up_btn.y + 10))
-        self.screen.blit(self.font_medium.render("-", True, self.colors['text']), (min_down_btn.x + 15, min_down_btn.y + 10))
+        self.screen.blit(static['plus'], (min_up_btn.x + 15, min_up_btn.y + 10))
+        self.screen.blit(static['minus'], (min_down_btn.x + 15, min_down_btn.y + 10))
         
         # Max temperature setting
-        max_text = self.font_medium.render(f"Макс. темп.: {self.settings[room]['max_temp']}°C", True, self.colors['text'])
+        max_text = self._slot_text('max_temp', self.font_medium, f"Макс. темп.: {self.settings[room]['max_temp']}°C", self.colors['text'])
         self.screen.blit(max_text, (20, 220))
         
         # Max temp buttons
-        max_up_btn = pygame.Rect(300, 220, 40, 40)
-        max_down_btn = pygame.Rect(350, 220, 40, 40)
+        max_up_btn = btns['max_up']
+        max_down_btn = btns['max_down']
         
         pygame.draw.rect(self.screen, self.colors['button'], max_up_btn)
         pygame.draw.rect(self.screen, self.colors['button'], max_down_btn)
         
-        self.screen.blit(self.font_medium.render("+", True, self.colors['text']), (max_up_btn.x + 15, max_up_btn.y + 10))
-        self.screen.blit(self.font_medium.render("-", True, self.colors['text']), (max_down_btn.x + 15, max_down_btn.y + 10))
+        self.screen.blit(static['plus'], (max_up_btn.x + 15, max_up_btn.y + 10))
+        self.screen.blit(static['minus'], (max_down_btn.x + 15, max_down_btn.y + 10))
         
         # Manual control buttons
-        heat_btn = pygame.Rect(20, 280, 150, 60)
-        cool_btn = pygame.Rect(200, 280, 150, 60)
+        heat_btn = btns['heat']
+        cool_btn = btns['cool']
         
         heat_color = self.colors['active'] if self.settings[room]['manual_heat'] else self.colors['button']
         cool_color = self.colors['active'] if self.settings[room]['manual_cool'] else self.colors['button']
@@ -363,14 +571,13 @@ class ClimateControlApp:
         pygame.draw.rect(self.screen, heat_color, heat_btn)
         pygame.draw.rect(self.screen, cool_color, cool_btn)
         
-        self.screen.blit(self.font_medium.render("Ручной обогрев", True, self.colors['text']), (heat_btn.x + 10, heat_btn.y + 20))
-        self.screen.blit(self.font_medium.render("Ручное охлаждение", True, self.colors['text']), (cool_btn.x + 10, cool_btn.y + 20))
+        self.screen.blit(static['manual_heat_btn'], (heat_btn.x + 10, heat_btn.y + 20))
+        self.screen.blit(static['manual_cool_btn'], (cool_btn.x + 10, cool_btn.y + 20))
         
         # Back button
-        back_btn = pygame.Rect(self.width - 170, self.height - 70, 150, 60)
+        back_btn = btns['back']
         pygame.draw.rect(self.screen, (255, 100, 100), back_btn)
-        back_text = self.font_medium.render("Назад", True, (255, 255, 255))
-        self.screen.blit(back_text, (back_btn.x + 40, back_btn.y + 20))
+        self.screen.blit(static['back'], (back_btn.x + 40, back_btn.y + 20))
         
     def handle_events(self):
         for event in pygame.event.get():
@@ -380,143 +587,211 @@ class ClimateControlApp:
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE and self.current_screen == "settings":
                     self.current_screen = "main"
-                    save_settings(self.settings)
+                    self._invalidate()
+                    self._save_settings_if_changed()
                     return True
                     
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
+                self._invalidate()
                 
                 if self.current_screen == "main":
                     # Check if any settings button was clicked
-                    y_pos = 80
-                    for room in sensor_ids.keys():
-                        btn_rect = pygame.Rect(600, y_pos, 150, 40)
+                    for room, btn_rect in self.main_btns.items():
                         if btn_rect.collidepoint(pos):
                             self.selected_room = room
                             self.current_screen = "settings"
                             break
-                        y_pos += 60
                         
                 elif self.current_screen == "settings":
                     if not self.selected_room:
                         continue
                         
                     room = self.selected_room
+                    btns = self.settings_btns
+                    s = self.settings[room]
                     
                     # Min temperature buttons
-                    min_up_btn = pygame.Rect(300, 160, 40, 40)
-                    min_down_btn = pygame.Rect(350, 160, 40, 40)
-                    
-                    if min_up_btn.collidepoint(pos):
-                        self.settings[room]['min_temp'] += 1
-                    elif min_down_btn.collidepoint(pos):
-                        self.settings[room]['min_temp'] -= 1
+                    if btns['min_up'].collidepoint(pos):
+                        s['min_temp'] += 1
+                        self._settings_dirty = True
+                    elif btns['min_down'].collidepoint(pos):
+                        s['min_temp'] -= 1
+                        self._settings_dirty = True
                     
                     # Max temperature buttons
-                    max_up_btn = pygame.Rect(300, 220, 40, 40)
-                    max_down_btn = pygame.Rect(350, 220, 40, 40)
-                    
-                    if max_up_btn.collidepoint(pos):
-                        self.settings[room]['max_temp'] += 1
-                    elif max_down_btn.collidepoint(pos):
-                        self.settings[room]['max_temp'] -= 1
+                    if btns['max_up'].collidepoint(pos):
+                        s['max_temp'] += 1
+                        self._settings_dirty = True
+                    elif btns['max_down'].collidepoint(pos):
+                        s['max_temp'] -= 1
+                        self._settings_dirty = True
                     
                     # Manual control buttons
-                    heat_btn = pygame.Rect(20, 280, 150, 60)
-                    cool_btn = pygame.Rect(200, 280, 150, 60)
-                    
-                    if heat_btn.collidepoint(pos):
-                        self.settings[room]['manual_heat'] = not self.settings[room]['manual_heat']
-                        if self.settings[room]['manual_heat']:
-                            self.settings[room]['manual_cool'] = False
-                    elif cool_btn.collidepoint(pos):
-                        self.settings[room]['manual_cool'] = not self.settings[room]['manual_cool']
-                        if self.settings[room]['manual_cool']:
-                            self.settings[room]['manual_heat'] = False
+                    if btns['heat'].collidepoint(pos):
+                        s['manual_heat'] = not s['manual_heat']
+                        if s['manual_heat']:
+                            s['manual_cool'] = False
+                        self._settings_dirty = True
+                    elif btns['cool'].collidepoint(pos):
+                        s['manual_cool'] = not s['manual_cool']
+                        if s['manual_cool']:
+                            s['manual_heat'] = False
+                        self._settings_dirty = True
                     
                     # Back button
-                    back_btn = pygame.Rect(self.width - 170, self.height - 70, 150, 60)
-                    if back_btn.collidepoint(pos):
+                    if btns['back'].collidepoint(pos):
                         self.current_screen = "main"
-                        save_settings(self.settings)
+                        self._save_settings_if_changed()
         
         return True
         
+    def _save_settings_if_changed(self):
+        """Write settings only if they differ from what is on disk"""
+        if not self._settings_dirty:
+            return
+        settings_hash = hash(json.dumps(self.settings, sort_keys=True))
+        if settings_hash != self._settings_hash:
+            try:
+                save_settings(self.settings)
+            except OSError as e:
+                # Keep the settings dirty so the next Back/ESC or exit retries
+                print(f"Error saving settings: {e}")
+                return
+            self._settings_hash = settings_hash
+        self._settings_dirty = False
+        
+    def _temp_worker(self):
+        """Read all sensors in a loop and publish the results"""
+        while not self._stop.is_set():
+            cycle_start = time.time()
+            if self._bulk_read and trigger_bulk_conversion():
+                # All sensors convert in parallel; wait out a single conversion
+                if self._stop.wait(self._conversion_time):
+                    return
+                temps = {room: read_temp(device_file) for room, device_file in DEVICE_FILES.items()}
+                with self._temp_lock:
+                    self._latest_temps.update(temps)
+            else:
+                for room, device_file in DEVICE_FILES.items():
+                    temp = read_temp(device_file)
+                    with self._temp_lock:
+                        self._latest_temps[room] = temp
+                    if self._stop.wait(0.1):
+                        return
+            # Update every 5 seconds
+            self._stop.wait(max(0, 5 - (time.time() - cycle_start)))
+            
     def update_temperatures(self):
-        current_time = time.time()
-        if current_time - self.last_temp_update >= 5:  # Update every 5 seconds
-            for room, sensor_id in sensor_ids.items():
-                self.temperatures[room] = read_temp(sensor_id)
-            self.last_temp_update = current_time
+        """Take a non-blocking snapshot of the latest sensor readings"""
+        with self._temp_lock:
+            latest = dict(self._latest_temps)
+        for room, temp in latest.items():
+            if room not in self.temperatures or self.temperatures[room] != temp:
+                self.temperatures[room] = temp
+                self._invalidate_room(room)
+            
+    def _log(self, msg):
+        """Queue a timestamped message for the current control cycle"""
+        self._log_buf.append(f"[{self._now_str}] {msg}")
+        
+    def _flush_log(self):
+        if self._log_buf:
+            sys.stdout.write("\n".join(self._log_buf) + "\n")
+            sys.stdout.flush()
+            self._log_buf.clear()
             
+    def _decide(self, room, temp):
+        """Return (action, log message) for a room, or None if nothing changes"""
+        s = self.settings[room]
+        rs = self.room_states[room]
+        min_t, max_t, mh, mc = s['min_temp'], s['max_temp'], s['manual_heat'], s['manual_cool']
+        heating, cooling = rs['heating'], rs['cooling']
+        
+        # Manual control has priority
+        if mh:
+            if not heating:
+                return 'heat', f"Manual heating STARTED in {room}. Temperature: {temp:.2f}°C"
+        elif mc:
+            if not cooling:
+                return 'cool', f"Manual cooling STARTED in {room}. Temperature: {temp:.2f}°C"
+        
+        # Automatic control
+        elif temp > max_t and not cooling:
+            return 'cool', f"Cooling STARTED in {room}. Temperature: {temp:.2f}°C (Above {max_t}°C)"
+        elif temp <= max_t - 3 and cooling:
+            return 'stop', f"Cooling STOPPED in {room}. Temperature: {temp:.2f}°C (Below {max_t-3}°C)"
+        elif temp < min_t and not heating:
+            return 'heat', f"Heating STARTED in {room}. Temperature: {temp:.2f}°C (Below {min_t}°C)"
+        elif temp >= min_t + 3 and heating:
+            return 'stop', f"Heating STOPPED in {room}. Temperature: {temp:.2f}°C (Above {min_t+3}°C)"
+        return None
+    
     def control_climate(self):
         current_time = time.time()
+        if self._relay_test is not None and self._relay_test.is_alive():
+            return
         if current_time - self.last_control_update >= 10:  # Control every 10 seconds
-            for room, sensor_id in sensor_ids.items():
+            self._now_str = datetime.now().strftime('%H:%M:%S')
+            states_before = {room: (state['heating'], state['cooling'])
+                             for room, state in self.room_states.items()}
+            log = self._log
+            # First pass: decide what each room needs
+            transitions = []
+            for room in ROOM_LIST:
                 temp = self.temperatures.get(room)
                 if temp is None:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Room {room}: No temperature data")
+                    self._log(f"Room {room}: No temperature data")
                     continue
-                    
-                min_temp = self.settings[room]['min_temp']
-                max_temp = self.settings[room]['max_temp']
-                
-                # Manual control has priority
-                if self.settings[room]['manual_heat']:
-                    if not self.room_states[room]['heating']:
-                        if (set_relay(room, True) and 
-                            set_relay('heater_vent', True) and 
-                            set_relay('supply', True)):
-                            self.room_states[room]['heating'] = True
-                            self.room_states[room]['cooling'] = False
-                            print(f"[{datetime.now().strftime('%H:%M:%S')}] Manual heating STARTED in {room}. Temperature: {temp:.2f}°C")
-                
-                elif self.settings[room]['manual_cool']:
-                    if not self.room_states[room]['cooling']:
-                        if set_relay(room, True) and set_relay('ac', True):
-                            self.room_states[room]['cooling'] = True
-                            self.room_states[room]['heating'] = False
-                            print(f"[{datetime.now().strftime('%H:%M:%S')}] Manual cooling STARTED in {room}. Temperature: {temp:.2f}°C")
-                
-                # Automatic control
-                elif temp > max_temp and not self.room_states[room]['cooling']:
-                    if set_relay(room, True) and set_relay('ac', True):
-                        self.room_states[room]['cooling'] = True
-                        self.room_states[room]['heating'] = False
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Cooling STARTED in {room}. Temperature: {temp:.2f}°C (Above {max_temp}°C)")
-                    
-                elif temp <= max_temp - 3 and self.room_states[room]['cooling']:
-                    if set_relay(room, False):
-                        self.room_states[room]['cooling'] = False
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Cooling STOPPED in {room}. Temperature: {temp:.2f}°C (Below {max_temp-3}°C)")
-                    
-                elif temp < min_temp and not self.room_states[room]['heating']:
-                    if (set_relay(room, True) and 
-                        set_relay('heater_vent', True) and 
-                        set_relay('supply', True)):
-                        self.room_states[room]['heating'] = True
-                        self.room_states[room]['cooling'] = False
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Heating STARTED in {room}. Temperature: {temp:.2f}°C (Below {min_temp}°C)")
-                    
-                elif temp >= min_temp + 3 and self.room_states[room]['heating']:
-                    if set_relay(room, False):
-                        self.room_states[room]['heating'] = False
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] Heating STOPPED in {room}. Temperature: {temp:.2f}°C (Above {min_temp+3}°C)")
+                transition = self._decide(room, temp)
+                if transition:
+                    transitions.append((room, *transition))
+            
+            # Second pass: drive the relays for rooms that change state
+            for room, action, message in transitions:
+                if action == 'heat':
+                    ok = (set_relay(room, True, log=log) and
+                          set_relay('heater_vent', True, log=log) and
+                          set_relay('supply', True, log=log))
+                elif action == 'cool':
+                    ok = set_relay(room, True, log=log) and set_relay('ac', True, log=log)
+                else:
+                    ok = set_relay(room, False, log=log)
+                if not ok:
+                    continue
+                state = self.room_states[room]
+                self._heating_count -= state['heating']
+                self._cooling_count -= state['cooling']
+                state['heating'] = action == 'heat'
+                state['cooling'] = action == 'cool'
+                self._heating_count += state['heating']
+                self._cooling_count += state['cooling']
+                self._log(message)
             
             # Turn off AC if no room needs cooling
-            if all(not state['cooling'] for state in self.room_states.values()):
-                if set_relay('ac', False):
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] AC turned OFF (no room needs cooling)")
+            if self._cooling_count == 0:
+                if relay_state['ac'] and set_relay('ac', False, log=log):
+                    self._log("AC turned OFF (no room needs cooling)")
                 
             # Turn off heater vent and supply if no room needs heating
-            if all(not state['heating'] for state in self.room_states.values()):
-                if set_relay('heater_vent', False):
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Heater vent turned OFF")
-                if set_relay('supply', False):
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Supply turned OFF")
+            if self._heating_count == 0:
+                if relay_state['heater_vent'] and set_relay('heater_vent', False, log=log):
+                    self._log("Heater vent turned OFF")
+                if relay_state['supply'] and set_relay('supply', False, log=log):
+                    self._log("Supply turned OFF")
                 
+            self._flush_log()
             self.last_control_update = current_time
             
+            # Repaint rooms whose heating/cooling indicator changed
+            changed = False
+            for room, state in self.room_states.items():
+                if states_before[room] != (state['heating'], state['cooling']):
+                    self._invalidate_room(room)
+                    changed = True
+            if changed and self.current_screen == "main":
+                self._invalidate(self._system_rect)
+            
     def run(self):
         running = True
         while running:
@@ -525,19 +800,29 @@ class ClimateControlApp:
             self.update_temperatures()
             self.control_climate()
             
-            if self.current_screen == "main":
-                self.draw_main_screen()
-            elif self.current_screen == "settings":
-                self.draw_room_settings()
+            # The clock on the main screen changes once per second
+            now_sec = int(time.time())
+            if now_sec != self._last_clock_sec:
+                self._last_clock_sec = now_sec
+                self._time_str = datetime.fromtimestamp(now_sec).strftime('%Y-%m-%d %H:%M:%S')
+                self._time_surf = self.font_medium.render(self._time_str, True, self.colors['text'])
+                if self.current_screen == "main":
+                    self._invalidate(self._clock_rect)
+            
+            if self._dirty_rects:
+                if self.current_screen == "main":
+                    self.draw_main_screen()
+                elif self.current_screen == "settings":
+                    self.draw_room_settings()
+                pygame.display.update(self._dirty_rects)
+                self._dirty_rects = []
                 
-            pygame.display.flip()
-            self.clock.tick(30)
+            # The settings screen only changes on input
+            self.clock.tick(30 if self.current_screen == "main" else 10)
             
         # Cleanup
-        save_settings(self.settings)
-        # Turn off all relays on exit
-        for name in relay_devices:
-            set_relay(name, False)
+        self._stop.set()
+        self._save_settings_if_changed()
         pygame.quit()
 
 # Run the application
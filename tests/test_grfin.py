@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+pytest.importorskip('gpiozero')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import grfin
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Keep climate_settings.json out of the repo
+    app = grfin.ClimateControlApp()
+    yield app
+    app._stop.set()
+    pygame.quit()
+
+
+def click(app, monkeypatch, pos):
+    monkeypatch.setattr(pygame.mouse, 'get_pos', lambda: pos)
+    pygame.event.clear()
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+    return app.handle_events()
+
+
+def test_settings_screen_click(app, monkeypatch):
+    room = grfin.ROOM_LIST[0]
+    click(app, monkeypatch, app.main_btns[room].center)
+    assert app.current_screen == "settings"
+    assert app.selected_room == room
+
+    min_temp = app.settings[room]['min_temp']
+    max_temp = app.settings[room]['max_temp']
+    assert click(app, monkeypatch, app.settings_btns['min_up'].center)
+    assert click(app, monkeypatch, app.settings_btns['max_down'].center)
+    assert app.settings[room]['min_temp'] == min_temp + 1
+    assert app.settings[room]['max_temp'] == max_temp - 1
+
+    click(app, monkeypatch, app.settings_btns['heat'].center)
+    assert app.settings[room]['manual_heat']
+    click(app, monkeypatch, app.settings_btns['cool'].center)
+    assert app.settings[room]['manual_cool']
+    assert not app.settings[room]['manual_heat']
+
+
+def test_failed_save_keeps_settings_dirty(app, monkeypatch):
+    def fail(settings):
+        raise OSError("read-only file system")
+
+    room = grfin.ROOM_LIST[0]
+    app.settings[room]['min_temp'] += 1
+    app._settings_dirty = True
+    monkeypatch.setattr(grfin, 'save_settings', fail)
+    app._save_settings_if_changed()
+    assert app._settings_dirty
+
+    saved = []
+    monkeypatch.setattr(grfin, 'save_settings', saved.append)
+    app._save_settings_if_changed()
+    assert saved == [app.settings]
+    assert not app._settings_dirty